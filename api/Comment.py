@@ -1,30 +1,53 @@
 """Comment search handler for Reddit API."""
 import time
 import html
-import json
+import orjson
 import requests
 import falcon
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from typing import Dict, Any, List, Union
 import logging
 
 from Parameters import process
 from Helpers import (
     base36encode,
-    base36decode,
     get_submissions_from_es
 )
 import DBFunctions
-from config import config
+from config import ES_PRIMARY, ES_FALLBACK
+from http_client import es_session, ES_HEADERS
 from logger_config import default_logger
 from exceptions import ElasticsearchError, APIError
 
 logger = default_logger
 
+# Shared pool for overlapping auxiliary ES lookups with response post-processing
+executor = ThreadPoolExecutor(max_workers=8)
 
-def nested_dict():
-    """Create a nested defaultdict."""
-    return defaultdict(nested_dict)
+# Force html.unescape's lazy entity-table build at import time so the first
+# request does not pay for it
+html.unescape('&amp;')
+
+# Aggregation clause templates, built once at import; only min_doc_count and
+# frequency vary per request and get patched in with a shallow rebuild
+_SUBREDDIT_AGG = {
+    'significant_terms': {
+        'field': "subreddit.keyword",
+        'size': 1000,
+        'script_heuristic': {'script': {'lang': "painless", 'inline': "params._subset_freq"}},
+        'min_doc_count': 0
+    }
+}
+_AUTHOR_AGG = {'terms': {'field': 'author.keyword', 'size': 1000, 'order': {'_count': 'desc'}}}
+_CREATED_UTC_AGG = {'date_histogram': {'field': "created_utc", 'interval': "day", 'order': {'_key': "asc"}}}
+_LINK_ID_AGG = {'terms': {'field': "link_id", 'size': 250, 'order': {'_count': "desc"}}}
+
+# Cache-control headers, built once. ID lookups return effectively immutable
+# documents, so shared caches can hold them far longer than search results
+_CACHE_HEADER_SEARCH = ["public", "max-age=2", "s-maxage=2"]
+_CACHE_HEADER_IDS = ["public", "max-age=300", "s-maxage=3600", "immutable"]
+_VARY_HEADER = ["Accept-Encoding"]
 
 
 class CommentSearch:
@@ -33,7 +56,6 @@ class CommentSearch:
     def __init__(self):
         """Initialize the comment search handler."""
         self.params = None
-        self.es_primary, self.es_fallback = config.get_elasticsearch_urls()
         self.es_index = "/rc/comments/_search"
     
     def on_get(self, req, resp):
@@ -50,23 +72,40 @@ class CommentSearch:
         try:
             if 'ids' in self.params:
                 data = self.get_ids(self.params['ids'])
+            elif self.params.get('stream') in ('1', 'true'):
+                # NDJSON streaming: emit hits as they are formatted instead of
+                # materializing and encoding the whole response in one piece
+                response = self.search(f"{ES_PRIMARY}{self.es_index}")
+                resp.cache_control = _CACHE_HEADER_SEARCH
+                resp.vary = _VARY_HEADER
+                resp.content_type = 'application/x-ndjson'
+                # Handler instances are shared across requests and the body is
+                # produced after on_get returns, so hand the generator its own
+                # reference to this request's params
+                resp.stream = self._stream_response(response, start_time, self.params)
+                return
             else:
                 data = self.do_elasticsearch()
-            
+
             end_time = time.time()
             data["metadata"]["execution_time_milliseconds"] = round((end_time - start_time) * 1000, 2)
             data["metadata"]["version"] = "v3.0"
-            
-            resp.cache_control = ["public", "max-age=2", "s-maxage=2"]
-            resp.body = json.dumps(data, sort_keys=True, indent=4, separators=(',', ': '))
-            
+
+            resp.cache_control = _CACHE_HEADER_IDS if 'ids' in self.params else _CACHE_HEADER_SEARCH
+            resp.vary = _VARY_HEADER
+            if self.params.get('pretty') in ('1', 'true'):
+                resp.content_type = falcon.MEDIA_JSON
+                resp.data = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+            else:
+                resp.media = data
+
         except Exception as e:
-            logger.error(f"Error processing comment search: {e}", exc_info=True)
+            logger.error("Error processing comment search: %s", e, exc_info=True)
             resp.status = falcon.HTTP_500
-            resp.body = json.dumps({
+            resp.media = {
                 "error": "Internal server error",
                 "message": str(e)
-            })
+            }
     
     def get_ids(self, ids: Union[str, List[str]]) -> Dict[str, Any]:
         """
@@ -80,21 +119,17 @@ class CommentSearch:
         """
         if not isinstance(ids, (list, tuple)):
             ids = [ids]
-        
-        ids_to_get_from_db = []
-        for comment_id in ids:
-            comment_id = comment_id.lower()
-            if comment_id.startswith("t1_"):
-                comment_id = comment_id[3:]
-            ids_to_get_from_db.append(base36decode(comment_id))
+
+        # str.removeprefix and a direct base-36 int() keep the per-ID work in C
+        ids_to_get_from_db = [int(comment_id.lower().removeprefix("t1_"), 36) for comment_id in ids]
         
         try:
             rows = DBFunctions.pgdb.execute(
-                "SELECT * FROM comment WHERE (json->>'id')::bigint IN %s LIMIT 5000",
-                tuple(ids_to_get_from_db)
+                "SELECT json FROM comment WHERE (json->>'id')::bigint = ANY(%s) LIMIT 5000",
+                (ids_to_get_from_db,)
             )
         except Exception as e:
-            logger.error(f"Error fetching comments from PostgreSQL: {e}")
+            logger.error("Error fetching comments from PostgreSQL: %s", e)
             raise APIError(f"Failed to retrieve comments: {e}")
         
         results = []
@@ -127,36 +162,14 @@ class CommentSearch:
         Returns:
             Dictionary containing search results and aggregations
         """
-        response = self.search(f"{self.es_primary}{self.es_index}")
-        results = []
+        response = self.search(f"{ES_PRIMARY}{self.es_index}")
         data = {}
-        
-        # Process search results
-        for hit in response["data"]["hits"]["hits"]:
-            source = hit["_source"]
-            source["id"] = base36encode(int(hit["_id"]))
-            source["link_id"] = "t3_" + base36encode(source["link_id"])
-            
-            # Format parent_id
-            if 'parent_id' in source:
-                source["parent_id"] = "t1_" + base36encode(source["parent_id"])
-            else:
-                source["parent_id"] = source["link_id"]
-            
-            source["subreddit_id"] = "t5_" + base36encode(source["subreddit_id"])
-            
-            # Unescape HTML entities
-            source["author_flair_text"] = html.unescape(source.get("author_flair_text", "")) or None
-            source["author_flair_css_class"] = html.unescape(source.get("author_flair_css_class", "")) or None
-            
-            # Apply field filtering if requested
-            self._apply_field_filter(source)
-            
-            results.append(source)
-        
+
+        results = list(self._format_hits(response["data"]["hits"]["hits"], self.params))
+
         # Process aggregations
         if 'aggregations' in response["data"]:
-            data["aggs"] = self._process_aggregations(response["data"]["aggregations"])
+            data["aggs"] = self._process_aggregations(response["data"]["aggregations"], self.params)
         
         data["data"] = results
         data["metadata"] = {}
@@ -168,30 +181,122 @@ class CommentSearch:
         
         return data
     
-    def _apply_field_filter(self, source: Dict[str, Any]):
-        """Apply field filtering if 'fields' parameter is specified."""
-        if 'fields' in self.params and self.params['fields'] is not None:
-            if isinstance(self.params['fields'], str):
-                self.params['fields'] = [self.params['fields']]
-            self.params['fields'] = [x.lower() for x in self.params['fields']]
-            
-            for key in list(source.keys()):
-                if key.lower() not in self.params['fields']:
-                    source.pop(key, None)
-    
-    def _process_aggregations(self, aggregations: Dict[str, Any]) -> Dict[str, Any]:
+    def _format_hits(self, hits: List[Dict[str, Any]], params: Dict[str, Any]):
+        """
+        Yield formatted comment dicts from raw Elasticsearch hits.
+
+        Args:
+            hits: Raw hit list from the ES response
+            params: The request's parameters (passed in rather than read from
+                self so a streamed body is not affected by later requests)
+
+        Yields:
+            Formatted comment source dicts
+        """
+        # Many comments in a page share the same link_id/subreddit_id, so
+        # memoize those encodings across the hit loop
+        encoded_ids = {}
+
+        # Normalize the fields parameter once per request instead of per hit
+        fields_filter = self._build_field_filter(params)
+
+        # Bind hot callables to locals; the loop body runs once per hit
+        b36 = base36encode
+        unescape = html.unescape
+        encoded_get = encoded_ids.get
+
+        for hit in hits:
+            source = hit["_source"]
+            source["id"] = b36(int(hit["_id"]))
+
+            link_id = source["link_id"]
+            link_id_b36 = encoded_get(link_id)
+            if link_id_b36 is None:
+                link_id_b36 = encoded_ids[link_id] = b36(link_id)
+            source["link_id"] = f"t3_{link_id_b36}"
+
+            # Format parent_id
+            if 'parent_id' in source:
+                source["parent_id"] = f"t1_{b36(source['parent_id'])}"
+            else:
+                source["parent_id"] = source["link_id"]
+
+            subreddit_id = source["subreddit_id"]
+            subreddit_id_b36 = encoded_get(subreddit_id)
+            if subreddit_id_b36 is None:
+                subreddit_id_b36 = encoded_ids[subreddit_id] = b36(subreddit_id)
+            source["subreddit_id"] = f"t5_{subreddit_id_b36}"
+
+            # Unescape HTML entities; most flair strings contain none, so only
+            # pay for the entity scan when a '&' is present
+            flair = source.get("author_flair_text")
+            source["author_flair_text"] = (unescape(flair) if flair and '&' in flair else flair) or None
+            flair_css = source.get("author_flair_css_class")
+            source["author_flair_css_class"] = (unescape(flair_css) if flair_css and '&' in flair_css else flair_css) or None
+
+            # Apply field filtering if requested
+            if fields_filter is not None:
+                for key in [k for k in source if k.lower() not in fields_filter]:
+                    del source[key]
+
+            yield source
+
+    def _stream_response(self, response: Dict[str, Any], start_time: float, params: Dict[str, Any]):
+        """
+        Generate an NDJSON body: one line per hit, then aggs/metadata lines.
+
+        Hits are encoded and flushed as they are formatted, so the response
+        memory high-watermark stays flat and time-to-first-byte does not wait
+        on the full JSON encode.
+        """
+        hits = response["data"]["hits"]["hits"]
+        for source in self._format_hits(hits, params):
+            yield orjson.dumps(source) + b'\n'
+
+        if 'aggregations' in response["data"]:
+            aggs = self._process_aggregations(response["data"]["aggregations"], params)
+            yield orjson.dumps({"aggs": aggs}) + b'\n'
+
+        metadata = dict(response["metadata"])
+        metadata["results_returned"] = len(hits)
+        metadata["timed_out"] = response["data"]["timed_out"]
+        metadata["total_results"] = response["data"]["hits"]["total"]
+        metadata["shards"] = response["data"]["_shards"]
+        metadata["execution_time_milliseconds"] = round((time.time() - start_time) * 1000, 2)
+        metadata["version"] = "v3.0"
+        yield orjson.dumps({"metadata": metadata}) + b'\n'
+
+    def _build_field_filter(self, params: Dict[str, Any]):
+        """Build the lowercase allowed-field set from the 'fields' parameter."""
+        fields = params.get('fields')
+        if fields is None:
+            return None
+        if isinstance(fields, str):
+            fields = [fields]
+        return frozenset(x.lower() for x in fields)
+
+    def _process_aggregations(self, aggregations: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
         """Process Elasticsearch aggregations."""
         aggs = {}
-        
+
+        # Kick off the submission lookup for the link_id aggregation first so the
+        # ES round-trip overlaps with processing of the other aggregations
+        submission_future = None
+        if 'link_id' in aggregations:
+            ids = []
+            for bucket in aggregations["link_id"]["buckets"]:
+                if 'score' in bucket:
+                    bucket["score"] = bucket["doc_count"] / bucket["bg_count"]
+                ids.append(bucket["key"])
+            submission_future = executor.submit(get_submissions_from_es, ids)
+
         # Subreddit aggregation
         if 'subreddit' in aggregations:
-            for bucket in aggregations["subreddit"]["buckets"]:
+            buckets = aggregations["subreddit"]["buckets"]
+            for bucket in buckets:
                 bucket["score"] = bucket["doc_count"] / bucket["bg_count"]
-            aggs["subreddit"] = sorted(
-                aggregations["subreddit"]["buckets"],
-                key=lambda k: k['score'],
-                reverse=True
-            )
+            buckets.sort(key=itemgetter('score'), reverse=True)
+            aggs["subreddit"] = buckets
         
         # Author aggregation
         if 'author' in aggregations:
@@ -202,24 +307,19 @@ class CommentSearch:
         
         # Time aggregation
         if 'created_utc' in aggregations:
-            for bucket in aggregations["created_utc"]["buckets"]:
+            buckets = aggregations["created_utc"]["buckets"]
+            for bucket in buckets:
                 bucket.pop('key_as_string', None)
-                bucket["key"] = int(bucket["key"] / 1000)
-            aggs["created_utc"] = aggregations["created_utc"]["buckets"]
+                bucket["key"] = int(bucket["key"]) // 1000
+            aggs["created_utc"] = buckets
         
         # Link ID aggregation
-        if 'link_id' in aggregations:
-            ids = []
-            for bucket in aggregations["link_id"]["buckets"]:
-                if 'score' in bucket:
-                    bucket["score"] = bucket["doc_count"] / bucket["bg_count"]
-                ids.append(bucket["key"])
-            
-            submission_data = get_submissions_from_es(ids)
-            
+        if submission_future is not None:
+            submission_data = submission_future.result()
+
             after = 0
-            if "after" in self.params:
-                after = int(self.params["after"])
+            if "after" in params:
+                after = int(params["after"])
             
             newlist = []
             for item in aggregations["link_id"]["buckets"]:
@@ -242,16 +342,17 @@ class CommentSearch:
         Returns:
             Elasticsearch response data
         """
-        q = nested_dict()
-        q['query']['bool']['filter'] = []
-        
+        q = {'query': {'bool': {'filter': []}}, 'sort': {}}
+
         # Add query parameter if present
         if 'q' in self.params and self.params['q'] is not None:
-            sqs = nested_dict()
-            sqs['simple_query_string']['query'] = self.params['q']
-            sqs['simple_query_string']['fields'] = ['body']
-            sqs['simple_query_string']['default_operator'] = 'and'
-            q['query']['bool']['filter'].append(sqs)
+            q['query']['bool']['filter'].append({
+                'simple_query_string': {
+                    'query': self.params['q'],
+                    'fields': ['body'],
+                    'default_operator': 'and'
+                }
+            })
         
         # Process parameters
         self.params, q = process(self.params, q)
@@ -263,7 +364,7 @@ class CommentSearch:
         response = self._execute_search(uri, q)
         
         results = {
-            'data': json.loads(response.text),
+            'data': orjson.loads(response.content),
             'metadata': {
                 'size': self.params['size'],
                 'sort': self.params['sort'],
@@ -276,60 +377,61 @@ class CommentSearch:
         
         return results
     
-    def _add_aggregations(self, q: defaultdict):
+    def _add_aggregations(self, q: Dict[str, Any]):
         """Add aggregation clauses to the Elasticsearch query."""
         if 'aggs' not in self.params or not self.params['aggs']:
             return
-        
+
         if isinstance(self.params['aggs'], str):
             self.params['aggs'] = [self.params['aggs']]
-        
+
         min_doc_count = 0
         if 'min_doc_count' in self.params and self.params['min_doc_count'] is not None:
-            from Helpers import looks_like_int
-            if looks_like_int(self.params['min_doc_count']):
-                min_doc_count = self.params['min_doc_count']
-        
+            from Helpers import parse_int
+            min_doc_count = parse_int(self.params['min_doc_count']) or 0
+
+        aggs_q = q.setdefault('aggs', {})
+
         for agg in self.params['aggs']:
             agg_lower = agg.lower()
-            
+
             if agg_lower == 'subreddit':
-                q['aggs']['subreddit']['significant_terms']['field'] = "subreddit.keyword"
-                q['aggs']['subreddit']['significant_terms']['size'] = 1000
-                q['aggs']['subreddit']['significant_terms']['script_heuristic']['script']['lang'] = "painless"
-                q['aggs']['subreddit']['significant_terms']['script_heuristic']['script']['inline'] = "params._subset_freq"
-                q['aggs']['subreddit']['significant_terms']['min_doc_count'] = min_doc_count
-            
+                if min_doc_count:
+                    aggs_q['subreddit'] = {
+                        'significant_terms': {**_SUBREDDIT_AGG['significant_terms'], 'min_doc_count': min_doc_count}
+                    }
+                else:
+                    aggs_q['subreddit'] = _SUBREDDIT_AGG
+
             elif agg_lower == 'author':
-                q['aggs']['author']['terms']['field'] = 'author.keyword'
-                q['aggs']['author']['terms']['size'] = 1000
-                q['aggs']['author']['terms']['order']['_count'] = 'desc'
-            
+                aggs_q['author'] = _AUTHOR_AGG
+
             elif agg_lower == 'created_utc':
-                q['aggs']['created_utc']['date_histogram']['field'] = "created_utc"
                 if self.params['frequency'] is None:
                     self.params['frequency'] = "day"
-                q['aggs']['created_utc']['date_histogram']['interval'] = self.params['frequency']
-                q['aggs']['created_utc']['date_histogram']['order']['_key'] = "asc"
-            
+                if self.params['frequency'] == "day":
+                    aggs_q['created_utc'] = _CREATED_UTC_AGG
+                else:
+                    aggs_q['created_utc'] = {
+                        'date_histogram': {**_CREATED_UTC_AGG['date_histogram'], 'interval': self.params['frequency']}
+                    }
+
             elif agg_lower == 'link_id':
-                q['aggs']['link_id']['terms']['field'] = "link_id"
-                q['aggs']['link_id']['terms']['size'] = 250
-                q['aggs']['link_id']['terms']['order']['_count'] = "desc"
-    
-    def _execute_search(self, uri: str, q: defaultdict) -> requests.Response:
+                aggs_q['link_id'] = _LINK_ID_AGG
+
+    def _execute_search(self, uri: str, q: Dict[str, Any]) -> requests.Response:
         """Execute Elasticsearch search with failover."""
         try:
-            response = requests.get(uri, data=json.dumps(q), timeout=30)
+            response = es_session.post(uri, data=orjson.dumps(q), headers=ES_HEADERS, timeout=30)
             response.raise_for_status()
             return response
         except requests.RequestException as e:
-            logger.warning(f"Elasticsearch primary failed: {e}, trying fallback...")
+            logger.warning("Elasticsearch primary failed: %s, trying fallback...", e)
             try:
-                fallback_uri = f"{self.es_fallback}{self.es_index}"
-                response = requests.get(fallback_uri, data=json.dumps(q), timeout=30)
+                fallback_uri = f"{ES_FALLBACK}{self.es_index}"
+                response = es_session.post(fallback_uri, data=orjson.dumps(q), headers=ES_HEADERS, timeout=30)
                 response.raise_for_status()
                 return response
             except requests.RequestException as e2:
-                logger.error(f"Both Elasticsearch nodes failed: {e2}")
+                logger.error("Both Elasticsearch nodes failed: %s", e2)
                 raise ElasticsearchError(f"Failed to connect to Elasticsearch: {e2}")
\ No newline at end of file
@@ -1,8 +1,11 @@
 """Database access layer with connection pooling and retry logic."""
+import orjson
 import psycopg2
 import time
 import logging
 from psycopg2 import OperationalError, DatabaseError
+from psycopg2.extras import register_default_json, register_default_jsonb
+from psycopg2.pool import ThreadedConnectionPool
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -13,89 +16,116 @@ class PostgreSQLManager:
 
     def __init__(self):
         """Initialize the database manager."""
-        self.db = None
+        self.pool = None
         self.max_retries = 5
         self.retry_delay = 1
         self.connect()
 
     def connect(self):
-        """Establish connection to PostgreSQL database."""
+        """Create the PostgreSQL connection pool."""
         try:
             connection_string = config.get_db_connection_string()
-            self.db = psycopg2.connect(connection_string)
-            self.db.set_session(autocommit=True)
-            logger.info(f"Successfully connected to PostgreSQL database on {config.db_config['host']}")
+            self.pool = ThreadedConnectionPool(minconn=2, maxconn=16, dsn=connection_string)
+            # Decode json/jsonb columns with orjson's C parser instead of
+            # stdlib json; this dominates row materialization for large fetches
+            register_default_json(globally=True, loads=orjson.loads)
+            register_default_jsonb(globally=True, loads=orjson.loads)
+            logger.info("Successfully connected to PostgreSQL database on %s", config.db_config['host'])
         except (OperationalError, psycopg2.OperationalError) as e:
-            logger.error(f"Failed to connect to PostgreSQL: {e}")
+            logger.error("Failed to connect to PostgreSQL: %s", e)
             raise
 
     def execute(self, sql: str, params: tuple = None):
         """
         Execute a SQL query with retry logic.
-        
+
         Args:
             sql: SQL query string
-            params: Query parameters as a tuple
-            
+            params: Query parameters as a tuple, one element per placeholder
+
         Returns:
             Query results as a list of tuples
-            
+
         Raises:
             DatabaseError: If query fails after all retries
         """
         retries = self.max_retries
-        
+
         while retries > 0:
+            conn = None
+            broken = False
             try:
-                cur = self.db.cursor()
-                
+                conn = self.pool.getconn()
+                conn.autocommit = True
+                cur = conn.cursor()
+
                 # Execute with parameter binding for SQL injection prevention
                 if params is not None:
-                    cur.execute(sql, (params,))
+                    cur.execute(sql, params)
                 else:
                     cur.execute(sql)
-                
-                rows = cur.fetchall()
+
+                # Drain in batches rather than one fetchall so multi-thousand
+                # row results materialize tuples incrementally
+                cur.arraysize = 2000
+                rows = cur.fetchmany()
+                if rows and len(rows) == cur.arraysize:
+                    extend = rows.extend
+                    batch = cur.fetchmany()
+                    while batch:
+                        extend(batch)
+                        batch = cur.fetchmany()
                 cur.close()
-                
-                logger.debug(f"Query executed successfully: {sql[:50]}...")
+
+                logger.debug("Query executed successfully: %.50s...", sql)
                 return rows
-                
+
             except (OperationalError, psycopg2.OperationalError) as e:
-                logger.warning(f"Database operation failed, retrying... ({retries} retries left): {e}")
+                logger.warning("Database operation failed, retrying... (%s retries left): %s", retries, e)
+                # Hand the broken connection back for replacement instead of
+                # serializing every caller behind a full reconnect
+                broken = True
                 retries -= 1
-                
+
                 if retries <= 0:
-                    logger.error(f"Database operation failed after {self.max_retries} retries")
+                    logger.error("Database operation failed after %s retries", self.max_retries)
                     raise DatabaseError(f"Failed to execute query after {self.max_retries} retries: {e}")
-                
+
                 time.sleep(self.retry_delay)
-                self.connect()
-                
+
             except DatabaseError as e:
-                logger.error(f"Database error: {e}")
+                logger.error("Database error: %s", e)
                 raise
-                
+
             except Exception as e:
-                logger.error(f"Unexpected error executing query: {e}")
+                logger.error("Unexpected error executing query: %s", e)
                 raise
 
+            finally:
+                if conn is not None:
+                    self.pool.putconn(conn, close=broken)
+
     def health_check(self) -> bool:
         """
         Check database connection health.
-        
+
         Returns:
             True if connection is healthy, False otherwise
         """
+        conn = None
         try:
-            cur = self.db.cursor()
+            conn = self.pool.getconn()
+            cur = conn.cursor()
             cur.execute("SELECT 1")
             cur.fetchone()
             cur.close()
             return True
         except Exception as e:
-            logger.warning(f"Health check failed: {e}")
+            logger.warning("Health check failed: %s", e)
             return False
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
 
 
 # Global database instance
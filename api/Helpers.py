@@ -1,66 +1,122 @@
 """Utility functions for the API."""
-import json
+import orjson
 import requests
-from collections import defaultdict
-from typing import Dict, List, Union
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, List, Optional, Union
 import logging
 
-from config import config
+from config import ES_PRIMARY, ES_FALLBACK
+from http_client import es_session, ES_HEADERS
 
 logger = logging.getLogger(__name__)
 
 
+def parse_int(value) -> Optional[int]:
+    """
+    Parse a value as an integer in a single pass.
+
+    Args:
+        value: Value to parse
+
+    Returns:
+        The integer value, or None if it cannot be parsed
+    """
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
 def looks_like_int(value: str) -> bool:
     """
     Check if a string can be converted to an integer.
-    
+
     Args:
         value: String value to check
-        
+
     Returns:
         True if value can be converted to int, False otherwise
     """
-    try:
-        int(value)
-        return True
-    except (ValueError, TypeError):
-        return False
+    return parse_int(value) is not None
 
 
-def base36encode(number: int, alphabet: str = '0123456789abcdefghijklmnopqrstuvwxyz') -> str:
+_B36_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+# Two-digit lookup table so the encoder loop emits two characters per divmod
+_B36_PAIRS = [_B36_ALPHABET[i // 36] + _B36_ALPHABET[i % 36] for i in range(1296)]
+
+
+@lru_cache(maxsize=1 << 16)
+def base36encode(number: int, alphabet: str = _B36_ALPHABET) -> str:
     """
     Convert an integer to a base36 string.
-    
+
+    Memoized: dashboards poll the same items, so the same IDs recur across
+    requests and a warm entry skips the encode entirely.
+
     Args:
         number: Integer to encode
         alphabet: Base alphabet to use (default is base36)
-        
+
     Returns:
         Base36 encoded string
-        
+
     Raises:
         TypeError: If number is not an integer
     """
     if not isinstance(number, int):
         raise TypeError('number must be an integer')
 
-    base36 = ''
-    sign = ''
+    if alphabet is not _B36_ALPHABET:
+        # Generic slow path for custom alphabets
+        base = len(alphabet)
+        sign = ''
+        if number < 0:
+            sign = '-'
+            number = -number
+        if number < base:
+            return sign + alphabet[number]
+        encoded = ''
+        while number != 0:
+            number, i = divmod(number, base)
+            encoded = alphabet[i] + encoded
+        return sign + encoded
 
+    sign = ''
     if number < 0:
         sign = '-'
         number = -number
 
-    if 0 <= number < len(alphabet):
-        return sign + alphabet[number]
-
-    while number != 0:
-        number, i = divmod(number, len(alphabet))
-        base36 = alphabet[i] + base36
-
-    return sign + base36
-
-
+    # Unrolled by digit count, mirroring a fixed-buffer encoder: nearly every
+    # Reddit ID lands in one of the first three branches, so the common cases
+    # run without a loop and with at most two divmods
+    if number < 1296:
+        if number < 36:
+            return sign + _B36_ALPHABET[number]
+        return sign + _B36_PAIRS[number]
+    if number < 1679616:  # 36 ** 4
+        q, r = divmod(number, 1296)
+        if q < 36:
+            return sign + _B36_ALPHABET[q] + _B36_PAIRS[r]
+        return sign + _B36_PAIRS[q] + _B36_PAIRS[r]
+    q, r = divmod(number, 1296)
+    q, r2 = divmod(q, 1296)
+    if q < 1296:
+        if q < 36:
+            return sign + _B36_ALPHABET[q] + _B36_PAIRS[r2] + _B36_PAIRS[r]
+        return sign + _B36_PAIRS[q] + _B36_PAIRS[r2] + _B36_PAIRS[r]
+    encoded = _B36_PAIRS[r2] + _B36_PAIRS[r]
+    while q >= 1296:
+        q, r = divmod(q, 1296)
+        encoded = _B36_PAIRS[r] + encoded
+    if q >= 36:
+        return sign + _B36_PAIRS[q] + encoded
+    return sign + _B36_ALPHABET[q] + encoded
+
+
+@lru_cache(maxsize=1 << 16)
 def base36decode(number: str) -> int:
     """
     Convert a base36 string to an integer.
@@ -74,58 +130,78 @@ def base36decode(number: str) -> int:
     return int(number, 36)
 
 
+# Short-lived LRU cache for submission lookups: hot link_id aggregations
+# repeat the same ID sets across requests, and a hit saves a full ES
+# round-trip. The TTL keeps freshly created submissions visible. Lookups run
+# on the handler thread pool, so all access goes through the lock.
+_SUBMISSION_CACHE = OrderedDict()
+_SUBMISSION_CACHE_LOCK = Lock()
+_SUBMISSION_CACHE_MAX = 1024
+_SUBMISSION_CACHE_TTL = 60
+
+
 def get_submissions_from_es(ids: Union[str, List[str]]) -> Dict[int, Dict]:
     """
     Fetch submission data from Elasticsearch by IDs.
-    
+
     Args:
         ids: Submission ID(s) as string or list of strings
-        
+
     Returns:
         Dictionary mapping base10 IDs to submission data
     """
     if not isinstance(ids, (list, tuple)):
         ids = [ids]
-    
-    nested_dict = lambda: defaultdict(nested_dict)
-    q = nested_dict()
-    
-    # Convert to integer IDs if needed
-    int_ids = [int(id) if isinstance(id, str) else id for id in ids]
-    q["query"]["terms"]["id"] = int_ids
-    q["size"] = 1000
-    
-    primary_url, fallback_url = config.get_elasticsearch_urls()
-    
+
+    # int() is a no-op for values that are already integers
+    int_ids = [int(i) for i in ids]
+
+    cache_key = frozenset(int_ids)
+    with _SUBMISSION_CACHE_LOCK:
+        cached = _SUBMISSION_CACHE.get(cache_key)
+        if cached is not None and cached[0] > time.time():
+            _SUBMISSION_CACHE.move_to_end(cache_key)
+            return cached[1]
+
+    q = {"query": {"terms": {"id": int_ids}}, "size": 1000}
+
     try:
-        response = requests.get(
-            f"{primary_url}/rs/submissions/_search",
-            data=json.dumps(q),
+        response = es_session.post(
+            f"{ES_PRIMARY}/rs/submissions/_search",
+            data=orjson.dumps(q),
+            headers=ES_HEADERS,
             timeout=30
         )
         response.raise_for_status()
     except requests.RequestException as e:
-        logger.warning(f"Failed to get submissions from primary ES, trying fallback: {e}")
+        logger.warning("Failed to get submissions from primary ES, trying fallback: %s", e)
         try:
-            response = requests.get(
-                f"{fallback_url}/rs/submissions/_search",
-                data=json.dumps(q),
+            response = es_session.post(
+                f"{ES_FALLBACK}/rs/submissions/_search",
+                data=orjson.dumps(q),
+                headers=ES_HEADERS,
                 timeout=30
             )
             response.raise_for_status()
         except requests.RequestException as e2:
-            logger.error(f"Failed to get submissions from fallback ES: {e2}")
+            logger.error("Failed to get submissions from fallback ES: %s", e2)
             return {}
     
-    s = json.loads(response.text)
+    s = orjson.loads(response.content)
     results = {}
-    
+
     for hit in s.get("hits", {}).get("hits", []):
         source = hit["_source"]
         base_10_id = source.get("id")
         source["id"] = base36encode(int(hit["_id"]))
         results[base_10_id] = source
-    
+
+    with _SUBMISSION_CACHE_LOCK:
+        _SUBMISSION_CACHE[cache_key] = (time.time() + _SUBMISSION_CACHE_TTL, results)
+        _SUBMISSION_CACHE.move_to_end(cache_key)
+        while len(_SUBMISSION_CACHE) > _SUBMISSION_CACHE_MAX:
+            _SUBMISSION_CACHE.popitem(last=False)
+
     return results
 
 
@@ -147,11 +223,11 @@ def get_submissions_from_pg(ids: Union[int, List[int]]) -> Dict[int, Dict]:
     
     try:
         rows = DBFunctions.pgdb.execute(
-            "SELECT * FROM submission WHERE (json->>'id')::int IN %s LIMIT 5000",
-            tuple(ids)
+            "SELECT json FROM submission WHERE (json->>'id')::int = ANY(%s) LIMIT 5000",
+            (list(ids),)
         )
     except Exception as e:
-        logger.error(f"Failed to get submissions from PostgreSQL: {e}")
+        logger.error("Failed to get submissions from PostgreSQL: %s", e)
         return {}
     
     results = {}
@@ -1,22 +1,20 @@
 """Query parameter processing for Elasticsearch queries."""
 import json
 import time
-from collections import defaultdict
 from typing import Dict, Any, Tuple, List
 import logging
 
-from Helpers import looks_like_int
+from Helpers import parse_int
 from logger_config import default_logger
 
 logger = default_logger
 
+# Accepted spellings for boolean filter values
+_BOOL_TRUE = frozenset({'true', '1'})
+_BOOL_FALSE = frozenset({'false', '0'})
 
-def nested_dict():
-    """Create a nested defaultdict for building Elasticsearch queries."""
-    return defaultdict(nested_dict)
 
-
-def process(params: Dict[str, Any], query: defaultdict) -> Tuple[Dict[str, Any], defaultdict]:
+def process(params: Dict[str, Any], query: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
     Process and normalize query parameters for Elasticsearch.
     
@@ -32,15 +30,12 @@ def process(params: Dict[str, Any], query: defaultdict) -> Tuple[Dict[str, Any],
     suggested_sort = "desc"
 
     # Filter by subreddit and author
-    conditions = ["subreddit", "author"]
-    for condition in conditions:
-        if condition in params and params[condition] is not None:
-            terms = nested_dict()
-            if not isinstance(params[condition], (list, tuple)):
-                params[condition] = [params[condition]]
-            params[condition] = [x.lower() for x in params[condition]]
-            terms['terms'][condition] = params[condition]
-            query['query']['bool']['filter'].append(terms)
+    for condition in ("subreddit", "author"):
+        value = params.get(condition)
+        if value is not None:
+            lowered = [x.lower() for x in (value if isinstance(value, (list, tuple)) else (value,))]
+            params[condition] = lowered
+            query['query']['bool']['filter'].append({'terms': {condition: lowered}})
 
     # Time range filtering
     params = _process_time_range(params, query)
@@ -65,9 +60,9 @@ def process(params: Dict[str, Any], query: defaultdict) -> Tuple[Dict[str, Any],
         params['size'] = params['limit']
 
     # Validate and set size
-    if 'size' in params and params['size'] is not None and looks_like_int(params['size']):
-        size = min(500, int(params['size']))  # Cap at 500
-        query['size'] = params['size'] = size
+    size = parse_int(params['size']) if 'size' in params and params['size'] is not None else None
+    if size is not None:
+        query['size'] = params['size'] = min(500, size)  # Cap at 500
     else:
         query['size'] = params['size'] = 25
 
@@ -92,85 +87,74 @@ def process(params: Dict[str, Any], query: defaultdict) -> Tuple[Dict[str, Any],
     return params, query
 
 
-def _process_time_range(params: Dict[str, Any], query: defaultdict) -> Dict[str, Any]:
+def _process_time_range(params: Dict[str, Any], query: Dict[str, Any]) -> Dict[str, Any]:
     """Process time range parameters (after/before)."""
     # After parameter
     if 'after' in params and params['after'] is not None:
         params['after'] = _parse_time_value(params['after'])
-        range_filter = nested_dict()
-        range_filter['range']['created_utc']['gt'] = params['after']
-        query['query']['bool']['filter'].append(range_filter)
-        params['after'] = params['after']  # Keep for metadata
+        query['query']['bool']['filter'].append({'range': {'created_utc': {'gt': params['after']}}})
     else:
         params['after'] = None
 
     # Before parameter
     if 'before' in params and params['before'] is not None:
         params['before'] = _parse_time_value(params['before'])
-        range_filter = nested_dict()
-        range_filter['range']['created_utc']['lt'] = params['before']
-        query['query']['bool']['filter'].append(range_filter)
-        params['before'] = params['before']  # Keep for metadata
+        query['query']['bool']['filter'].append({'range': {'created_utc': {'lt': params['before']}}})
     else:
         params['before'] = None
     
     return params
 
 
-def _process_score_filter(params: Dict[str, Any], query: defaultdict) -> Dict[str, Any]:
+def _process_score_filter(params: Dict[str, Any], query: Dict[str, Any]) -> Dict[str, Any]:
     """Process score filtering parameter."""
     if 'score' in params and params['score'] is not None:
-        range_filter = nested_dict()
         score = params['score']
-        
+
         if score.startswith("<"):
-            range_filter['range']['score']['lt'] = int(score[1:])
+            query['query']['bool']['filter'].append({'range': {'score': {'lt': int(score[1:])}}})
         elif score.startswith(">"):
-            range_filter['range']['score']['gt'] = int(score[1:])
-        elif looks_like_int(score):
-            range_filter['term']['score'] = int(score)
-        
-        query['query']['bool']['filter'].append(range_filter)
-    
+            query['query']['bool']['filter'].append({'range': {'score': {'gt': int(score[1:])}}})
+        else:
+            score_val = parse_int(score)
+            if score_val is not None:
+                query['query']['bool']['filter'].append({'term': {'score': score_val}})
+
     return params
 
 
-def _process_comment_count_filter(params: Dict[str, Any], query: defaultdict) -> Dict[str, Any]:
+def _process_comment_count_filter(params: Dict[str, Any], query: Dict[str, Any]) -> Dict[str, Any]:
     """Process num_comments filtering parameter."""
     if 'num_comments' in params and params['num_comments'] is not None:
-        range_filter = nested_dict()
         num_comments = params['num_comments']
-        
+
         if num_comments.startswith("<"):
-            range_filter['range']['num_comments']['lt'] = int(num_comments[1:])
+            query['query']['bool']['filter'].append({'range': {'num_comments': {'lt': int(num_comments[1:])}}})
         elif num_comments.startswith(">"):
-            range_filter['range']['num_comments']['gt'] = int(num_comments[1:])
-        elif looks_like_int(num_comments):
-            range_filter['term']['num_comments'] = int(num_comments)
-        
-        query['query']['bool']['filter'].append(range_filter)
-    
+            query['query']['bool']['filter'].append({'range': {'num_comments': {'gt': int(num_comments[1:])}}})
+        else:
+            num_comments_val = parse_int(num_comments)
+            if num_comments_val is not None:
+                query['query']['bool']['filter'].append({'term': {'num_comments': num_comments_val}})
+
     return params
 
 
-def _process_boolean_filters(params: Dict[str, Any], query: defaultdict) -> Dict[str, Any]:
+def _process_boolean_filters(params: Dict[str, Any], query: Dict[str, Any]) -> Dict[str, Any]:
     """Process boolean filter parameters."""
     conditions = ["over_18", "is_video", "stickied", "spoiler", "locked", "contest_mode"]
     
     for condition in conditions:
-        if condition in params and params[condition] is not None:
-            parameter = nested_dict()
-            value = params[condition]
-            
-            if value.lower() == 'true' or value == "1":
-                parameter['term'][condition] = "true"
-            elif value.lower() == 'false' or value == "0":
-                parameter['term'][condition] = "false"
+        value = params.get(condition)
+        if value is not None:
+            lowered = value.lower()
+
+            if lowered in _BOOL_TRUE:
+                query['query']['bool']['filter'].append({'term': {condition: "true"}})
+            elif lowered in _BOOL_FALSE:
+                query['query']['bool']['filter'].append({'term': {condition: "false"}})
             else:
-                logger.warning(f"Invalid boolean value for {condition}: {value}")
-                continue
-            
-            query['query']['bool']['filter'].append(parameter)
+                logger.warning("Invalid boolean value for %s: %s", condition, value)
     
     return params
 
@@ -183,9 +167,10 @@ def _parse_time_value(time_value: str) -> int:
     - Epoch timestamp (integer string)
     - Relative time: {number}{unit} (e.g., 30d, 24h, 7m, 3600s)
     """
-    if looks_like_int(time_value):
-        return int(time_value)
-    
+    epoch = parse_int(time_value)
+    if epoch is not None:
+        return epoch
+
     if not time_value or len(time_value) < 2:
         raise ValueError(f"Invalid time format: {time_value}")
     
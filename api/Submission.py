@@ -1,29 +1,42 @@
 """Submission search handler for Reddit API."""
 import time
 import html
-import json
+import orjson
 import requests
 import falcon
-from collections import defaultdict
+from operator import itemgetter
 from typing import Dict, Any, List, Union
 import logging
 
+import fast_json
 from Parameters import process
+from cache import response_cache
 from Helpers import (
     base36encode,
     base36decode
 )
 import DBFunctions
-from config import config
+from config import ES_PRIMARY, ES_FALLBACK
+from http_client import hedged_post
 from logger_config import default_logger
 from exceptions import ElasticsearchError, APIError
 
 logger = default_logger
 
-
-def nested_dict():
-    """Create a nested defaultdict."""
-    return defaultdict(nested_dict)
+# Aggregation clause templates, built once at import; only min_doc_count and
+# frequency vary per request and get patched in with a shallow rebuild
+_SUBREDDIT_AGG = {
+    'significant_terms': {
+        'field': "subreddit.keyword",
+        'size': 1000,
+        'script_heuristic': {'script': {'lang': "painless", 'inline': "params._subset_freq"}},
+        'min_doc_count': 0
+    }
+}
+_AUTHOR_AGG = {'terms': {'field': 'author.keyword', 'size': 1000, 'order': {'_count': 'desc'}}}
+_CREATED_UTC_AGG = {'date_histogram': {'field': "created_utc", 'interval': "day", 'order': {'_key': "asc"}}}
+_DOMAIN_AGG = {'terms': {'field': 'domain.keyword', 'size': 1000, 'order': {'_count': 'desc'}}}
+_TIME_OF_DAY_AGG = {'significant_terms': {'field': 'hour', 'size': 25}}
 
 
 class SubmissionSearch:
@@ -32,7 +45,6 @@ class SubmissionSearch:
     def __init__(self):
         """Initialize the submission search handler."""
         self.params = None
-        self.es_primary, self.es_fallback = config.get_elasticsearch_urls()
         self.es_index = "/rs/submissions/_search"
     
     def on_get(self, req, resp):
@@ -54,80 +66,154 @@ class SubmissionSearch:
                     "execution_time_milliseconds": round((end_time - self.start_time) * 1000, 2),
                     "version": "v3.0"
                 }
+            elif self.params.get('stream') in ('1', 'true'):
+                # NDJSON streaming: emit hits as they are formatted instead of
+                # materializing and encoding the whole response in one piece
+                response = self.search(f"{ES_PRIMARY}{self.es_index}")
+                resp.cache_control = ["public", "max-age=2", "s-maxage=2"]
+                resp.content_type = 'application/x-ndjson'
+                # Handler instances are shared across requests and the body is
+                # produced after on_get returns, so hand the generator its own
+                # reference to this request's params
+                resp.stream = self._stream_response(response, self.start_time, self.params)
+                return
             else:
-                response = self.search(f"{self.es_primary}{self.es_index}")
+                response = self.search(f"{ES_PRIMARY}{self.es_index}")
                 data = self._process_search_results(response)
                 end_time = time.time()
                 data["metadata"]["execution_time_milliseconds"] = round((end_time - self.start_time) * 1000, 2)
                 data["metadata"]["version"] = "v3.0"
             
             resp.cache_control = ["public", "max-age=2", "s-maxage=2"]
-            resp.body = json.dumps(data, sort_keys=True, indent=4, separators=(',', ': '))
-            
+            resp.content_type = falcon.MEDIA_JSON
+            resp.data = fast_json.dumps(data, pretty=self.params.get('pretty') in ('1', 'true'))
+
         except Exception as e:
-            logger.error(f"Error processing submission search: {e}", exc_info=True)
+            logger.error("Error processing submission search: %s", e, exc_info=True)
             resp.status = falcon.HTTP_500
-            resp.body = json.dumps({
+            resp.content_type = falcon.MEDIA_JSON
+            resp.data = fast_json.dumps({
                 "error": "Internal server error",
                 "message": str(e)
             })
     
-    def _process_search_results(self, response: Dict[str, Any]) -> Dict[str, Any]:
-        """Process Elasticsearch search results."""
-        results = []
-        data = {}
-        
-        # Process hits
-        for hit in response["data"]["hits"]["hits"]:
+    def _format_hits(self, hits, params: Dict[str, Any]):
+        """
+        Format raw ES hits into response-ready submission dicts.
+
+        Args:
+            hits: Raw hit list from the ES response
+            params: The request's parameters (passed in rather than read from
+                self so a streamed body is not affected by later requests)
+
+        Yields:
+            Formatted submission source dicts
+        """
+        # Normalize the fields parameter once per request instead of per hit
+        fields_filter = self._build_field_filter(params)
+
+        # A page of submissions spans few distinct subreddits, so memoize the
+        # subreddit_id encodings across the hit loop
+
+        # Bind hot callables to locals; the loop body runs once per hit
+        encoded_ids = {}
+        b36 = base36encode
+        unescape = html.unescape
+        encoded_get = encoded_ids.get
+
+        for hit in hits:
             source = hit["_source"]
-            source["id"] = base36encode(int(hit["_id"]))
-            
+            source["id"] = b36(int(hit["_id"]))
+
             # Format subreddit_id
-            if 'subreddit_id' in source and source["subreddit_id"] is not None:
-                try:
-                    source["subreddit_id"] = "t5_" + base36encode(source["subreddit_id"])
-                except (TypeError, ValueError):
-                    source["subreddit_id"] = None
+            subreddit_id = source.get("subreddit_id")
+            if subreddit_id is not None:
+                formatted = encoded_get(subreddit_id)
+                if formatted is None:
+                    try:
+                        formatted = encoded_ids[subreddit_id] = f"t5_{b36(subreddit_id)}"
+                    except (TypeError, ValueError):
+                        formatted = encoded_ids[subreddit_id] = None
+                source["subreddit_id"] = formatted
             else:
                 source["subreddit_id"] = None
-            
-            # Unescape HTML entities
-            source["author_flair_text"] = html.unescape(source.get("author_flair_text", "")) or None
-            source["author_flair_css_class"] = html.unescape(source.get("author_flair_css_class", "")) or None
-            
+
+            # Unescape HTML entities; most flair strings contain none, so only
+            # pay for the entity scan when a '&' is present
+            flair = source.get("author_flair_text")
+            source["author_flair_text"] = (unescape(flair) if flair and '&' in flair else flair) or None
+            flair_css = source.get("author_flair_css_class")
+            source["author_flair_css_class"] = (unescape(flair_css) if flair_css and '&' in flair_css else flair_css) or None
+
             # Add full_link
-            if source.get("permalink"):
-                source["full_link"] = f"https://www.reddit.com{source['permalink']}"
-            
-            # Apply field filtering
-            self._apply_field_filter(source)
-            results.append(source)
-        
+            permalink = source.get("permalink")
+            if permalink:
+                source["full_link"] = f"https://www.reddit.com{permalink}"
+
+            # Apply field filtering if requested
+            if fields_filter is not None:
+                for key in [k for k in source if k.lower() not in fields_filter]:
+                    del source[key]
+
+            yield source
+
+    def _stream_response(self, response: Dict[str, Any], start_time: float, params: Dict[str, Any]):
+        """
+        Generate an NDJSON body: one line per hit, then aggs/metadata lines.
+
+        Hits are encoded and flushed as they are formatted, so the response
+        memory high-watermark stays flat and time-to-first-byte does not wait
+        on the full JSON encode.
+        """
+        es_data = response["data"]
+        hits = es_data["hits"]["hits"]
+        for source in self._format_hits(hits, params):
+            yield orjson.dumps(source) + b'\n'
+
+        if 'aggregations' in es_data:
+            aggs = self._process_aggregations(es_data["aggregations"], es_data)
+            yield orjson.dumps({"aggs": aggs}) + b'\n'
+
+        metadata = dict(response["metadata"])
+        metadata["results_returned"] = len(hits)
+        metadata["timed_out"] = es_data["timed_out"]
+        metadata["total_results"] = es_data["hits"]["total"]
+        metadata["shards"] = es_data["_shards"]
+        metadata["execution_time_milliseconds"] = round((time.time() - start_time) * 1000, 2)
+        metadata["version"] = "v3.0"
+        yield orjson.dumps({"metadata": metadata}) + b'\n'
+
+    def _process_search_results(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Process Elasticsearch search results."""
+        data = {}
+        es_data = response["data"]
+        hits = es_data["hits"]["hits"]
+
+        results = list(self._format_hits(hits, self.params))
+
         # Process aggregations
-        if 'aggregations' in response["data"]:
-            data['aggs'] = self._process_aggregations(response["data"]["aggregations"], response["data"])
-        
+        if 'aggregations' in es_data:
+            data['aggs'] = self._process_aggregations(es_data["aggregations"], es_data)
+
         data['data'] = results
         data['metadata'] = {
             **response['metadata'],
-            'results_returned': len(response["data"]["hits"]["hits"]),
-            'timed_out': response['data']['timed_out'],
-            'total_results': response['data']['hits']['total'],
-            'shards': response['data']['_shards']
+            'results_returned': len(hits),
+            'timed_out': es_data['timed_out'],
+            'total_results': es_data['hits']['total'],
+            'shards': es_data['_shards']
         }
-        
+
         return data
     
-    def _apply_field_filter(self, source: Dict[str, Any]):
-        """Apply field filtering if 'fields' parameter is specified."""
-        if 'fields' in self.params and self.params['fields'] is not None:
-            if isinstance(self.params['fields'], str):
-                self.params['fields'] = [self.params['fields']]
-            self.params['fields'] = [x.lower() for x in self.params['fields']]
-            
-            for key in list(source.keys()):
-                if key.lower() not in self.params['fields']:
-                    source.pop(key, None)
+    def _build_field_filter(self, params: Dict[str, Any]):
+        """Build the lowercase allowed-field set from the 'fields' parameter."""
+        fields = params.get('fields')
+        if fields is None:
+            return None
+        if isinstance(fields, str):
+            fields = [fields]
+        return frozenset(x.lower() for x in fields)
     
     def _process_aggregations(self, aggregations: Dict[str, Any], es_response: Dict[str, Any]) -> Dict[str, Any]:
         """Process Elasticsearch aggregations."""
@@ -135,26 +221,25 @@ class SubmissionSearch:
         
         # Subreddit aggregation
         if 'subreddit' in aggregations:
-            for bucket in aggregations["subreddit"]["buckets"]:
-                bucket["score"] = round(bucket["doc_count"] / bucket["bg_count"], 5)
-            aggs["subreddit"] = sorted(
-                aggregations["subreddit"]["buckets"],
-                key=lambda k: k['score'],
-                reverse=True
-            )
-        
+            buckets = aggregations["subreddit"]["buckets"]
+            _round = round
+            for bucket in buckets:
+                bucket["score"] = _round(bucket["doc_count"] / bucket["bg_count"], 5)
+            buckets.sort(key=itemgetter('score'), reverse=True)
+            aggs["subreddit"] = buckets
+
         # Author aggregation
         if 'author' in aggregations:
             for bucket in aggregations["author"]["buckets"]:
                 if 'score' in bucket:
                     bucket["score"] = bucket["doc_count"] / bucket["bg_count"]
             aggs["author"] = aggregations["author"]["buckets"]
-        
+
         # Time aggregation
         if 'created_utc' in aggregations:
             for bucket in aggregations["created_utc"]["buckets"]:
                 bucket.pop('key_as_string', None)
-                bucket["key"] = int(bucket["key"] / 1000)
+                bucket["key"] = bucket["key"] // 1000
             aggs["created_utc"] = aggregations["created_utc"]["buckets"]
         
         # Domain aggregation
@@ -167,21 +252,24 @@ class SubmissionSearch:
         
         # Time of day aggregation
         if 'time_of_day' in aggregations:
-            total_bg_count = aggregations["time_of_day"]["bg_count"]
-            total_doc_count = aggregations["time_of_day"]["doc_count"]
-            
-            for bucket in aggregations["time_of_day"]["buckets"]:
-                bucket['bg_percentage'] = round(bucket['bg_count'] * 100 / total_bg_count, 5)
-                bucket['doc_percentage'] = round(bucket['doc_count'] * 100 / total_doc_count, 5)
-                bucket['deviation_percentage'] = round(bucket['doc_percentage'] - bucket['bg_percentage'], 4)
+            # Strength-reduce the per-bucket divisions to one multiply each
+            bg_scale = 100 / aggregations["time_of_day"]["bg_count"]
+            doc_scale = 100 / aggregations["time_of_day"]["doc_count"]
+            _round = round
+
+            buckets = aggregations["time_of_day"]["buckets"]
+            for bucket in buckets:
+                bg_pct = _round(bucket['bg_count'] * bg_scale, 5)
+                doc_pct = _round(bucket['doc_count'] * doc_scale, 5)
+                bucket['bg_percentage'] = bg_pct
+                bucket['doc_percentage'] = doc_pct
+                bucket['deviation_percentage'] = _round(doc_pct - bg_pct, 4)
                 bucket['utc_hour'] = bucket['key']
                 bucket.pop('score', None)
                 bucket.pop('key', None)
-            
-            aggs["time_of_day"] = sorted(
-                aggregations["time_of_day"]["buckets"],
-                key=lambda k: k['utc_hour']
-            )
+
+            buckets.sort(key=itemgetter('utc_hour'))
+            aggs["time_of_day"] = buckets
         
         return aggs
     
@@ -195,48 +283,60 @@ class SubmissionSearch:
         Returns:
             Elasticsearch response data
         """
-        q = nested_dict()
-        q['query']['bool']['filter'] = []
-        q['query']['bool']['must_not'] = []
-        
+        q = {'query': {'bool': {'filter': [], 'must_not': []}}, 'sort': {}}
+
         # Process parameters
         self.params, q = process(self.params, q)
-        
+
         # Add query parameter
         if 'q' in self.params and self.params['q'] is not None:
-            sqs = nested_dict()
-            sqs['simple_query_string']['query'] = self.params['q']
-            sqs['simple_query_string']['default_operator'] = 'and'
-            q['query']['bool']['filter'].append(sqs)
-        
+            q['query']['bool']['filter'].append({
+                'simple_query_string': {
+                    'query': self.params['q'],
+                    'default_operator': 'and'
+                }
+            })
+
         # Add field-specific queries
         for field in ["title", "selftext"]:
             if field in self.params and self.params[field] is not None:
-                sqs = nested_dict()
-                sqs['simple_query_string']['query'] = self.params[field]
-                sqs['simple_query_string']['fields'] = [field]
-                sqs['simple_query_string']['default_operator'] = 'and'
-                q['query']['bool']['filter'].append(sqs)
-        
+                q['query']['bool']['filter'].append({
+                    'simple_query_string': {
+                        'query': self.params[field],
+                        'fields': [field],
+                        'default_operator': 'and'
+                    }
+                })
+
         # Add exclusion queries
         not_conditions = ["title:not", "q:not", "selftext:not"]
         for condition in not_conditions:
             if condition in self.params and self.params[condition] is not None:
-                sqs = nested_dict()
-                sqs['simple_query_string']['query'] = self.params[condition]
+                sqs = {
+                    'simple_query_string': {
+                        'query': self.params[condition],
+                        'default_operator': 'and'
+                    }
+                }
                 if condition != 'q:not':
                     sqs['simple_query_string']['fields'] = [condition.split(":")[0]]
-                sqs['simple_query_string']['default_operator'] = 'and'
                 q['query']['bool']['must_not'].append(sqs)
         
         # Add aggregations
         self._add_aggregations(q)
-        
+
+        # Filter fields server-side too: fewer bytes on the wire and less JSON
+        # to parse. The hit formatter still reads these source fields, so keep
+        # them in the response; the Python filter strips them afterwards
+        fields_filter = self._build_field_filter(self.params)
+        if fields_filter is not None:
+            q['_source'] = {'includes': sorted(fields_filter | {'permalink', 'subreddit_id'})}
+
         # Execute search
-        response = self._execute_search(uri, q)
-        
+        content = self._execute_search(uri, q)
+
         results = {
-            'data': json.loads(response.text),
+            'data': orjson.loads(content),
             'metadata': {
                 'sort': self.params['sort'],
                 'sort_type': self.params['sort_type']
@@ -245,67 +345,72 @@ class SubmissionSearch:
         
         return results
     
-    def _add_aggregations(self, q: defaultdict):
+    def _add_aggregations(self, q: Dict[str, Any]):
         """Add aggregation clauses to the Elasticsearch query."""
         if 'aggs' not in self.params or not self.params['aggs']:
             return
-        
+
         if isinstance(self.params['aggs'], str):
             self.params['aggs'] = [self.params['aggs']]
-        
+
         min_doc_count = 0
         if 'min_doc_count' in self.params and self.params['min_doc_count'] is not None:
-            from Helpers import looks_like_int
-            if looks_like_int(self.params['min_doc_count']):
-                min_doc_count = self.params['min_doc_count']
-        
+            from Helpers import parse_int
+            min_doc_count = parse_int(self.params['min_doc_count']) or 0
+
+        aggs_q = q.setdefault('aggs', {})
+
         for agg in self.params['aggs']:
             agg_lower = agg.lower()
-            
+
             if agg_lower == 'subreddit':
-                q['aggs']['subreddit']['significant_terms']['field'] = 'subreddit.keyword'
-                q['aggs']['subreddit']['significant_terms']['size'] = 1000
-                q['aggs']['subreddit']['significant_terms']['script_heuristic']['script']['lang'] = 'painless'
-                q['aggs']['subreddit']['significant_terms']['script_heuristic']['script']['inline'] = 'params._subset_freq'
-                q['aggs']['subreddit']['significant_terms']['min_doc_count'] = min_doc_count
-            
+                if min_doc_count:
+                    aggs_q['subreddit'] = {
+                        'significant_terms': {**_SUBREDDIT_AGG['significant_terms'], 'min_doc_count': min_doc_count}
+                    }
+                else:
+                    aggs_q['subreddit'] = _SUBREDDIT_AGG
+
             elif agg_lower == 'author':
-                q['aggs']['author']['terms']['field'] = 'author.keyword'
-                q['aggs']['author']['terms']['size'] = 1000
-                q['aggs']['author']['terms']['order']['_count'] = 'desc'
-            
+                aggs_q['author'] = _AUTHOR_AGG
+
             elif agg_lower == 'created_utc':
-                q['aggs']['created_utc']['date_histogram']['field'] = 'created_utc'
                 if self.params['frequency'] is None:
                     self.params['frequency'] = "day"
-                q['aggs']['created_utc']['date_histogram']['interval'] = self.params['frequency']
-                q['aggs']['created_utc']['date_histogram']['order']['_key'] = 'asc'
-            
+                if self.params['frequency'] == "day":
+                    aggs_q['created_utc'] = _CREATED_UTC_AGG
+                else:
+                    aggs_q['created_utc'] = {
+                        'date_histogram': {**_CREATED_UTC_AGG['date_histogram'], 'interval': self.params['frequency']}
+                    }
+
             elif agg_lower == 'domain':
-                q['aggs']['domain']['terms']['field'] = 'domain.keyword'
-                q['aggs']['domain']['terms']['size'] = 1000
-                q['aggs']['domain']['terms']['order']['_count'] = 'desc'
-            
+                aggs_q['domain'] = _DOMAIN_AGG
+
             elif agg_lower == 'time_of_day':
-                q['aggs']['time_of_day']['significant_terms']['field'] = 'hour'
-                q['aggs']['time_of_day']['significant_terms']['size'] = 25
+                aggs_q['time_of_day'] = _TIME_OF_DAY_AGG
     
-    def _execute_search(self, uri: str, q: defaultdict) -> requests.Response:
-        """Execute Elasticsearch search with failover."""
+    def _execute_search(self, uri: str, q: Dict[str, Any]) -> bytes:
+        """Execute Elasticsearch search with caching and failover."""
+        # Sorted keys give a canonical body, so identical queries share a key
+        body = orjson.dumps(q, option=orjson.OPT_SORT_KEYS)
+        cache_key = response_cache.make_key(self.es_index, body)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            response = requests.get(uri, data=json.dumps(q), timeout=30)
-            response.raise_for_status()
-            return response
+            response = hedged_post(uri, f"{ES_FALLBACK}{self.es_index}", body)
         except requests.RequestException as e:
-            logger.warning(f"Elasticsearch primary failed: {e}, trying fallback...")
-            try:
-                fallback_uri = f"{self.es_fallback}{self.es_index}"
-                response = requests.get(fallback_uri, data=json.dumps(q), timeout=30)
-                response.raise_for_status()
-                return response
-            except requests.RequestException as e2:
-                logger.error(f"Both Elasticsearch nodes failed: {e2}")
-                raise ElasticsearchError(f"Failed to connect to Elasticsearch: {e2}")
+            stale = response_cache.get_stale(cache_key)
+            if stale is not None:
+                logger.warning("Serving stale cached search response")
+                return stale
+            raise ElasticsearchError(f"Failed to connect to Elasticsearch: {e}")
+
+        content = response.content
+        response_cache.set(cache_key, content, 'search')
+        return content
     
     def get_ids(self, ids: Union[str, List[str]]) -> Dict[str, Any]:
         """
@@ -327,32 +432,54 @@ class SubmissionSearch:
                 sub_id = sub_id[3:]
             ids_to_fetch.append(base36decode(sub_id))
         
-        q = nested_dict()
-        q["query"]["terms"]["id"] = ids_to_fetch
-        q["size"] = 500
-        
-        try:
-            response = requests.get(f"{self.es_primary}/rs/submissions/_search", data=json.dumps(q), timeout=30)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            logger.error(f"Failed to fetch submissions: {e}")
-            raise ElasticsearchError(f"Failed to retrieve submissions: {e}")
+        q = {"query": {"terms": {"id": ids_to_fetch}}, "size": 500}
+
+        fields_filter = self._build_field_filter(self.params)
+        if fields_filter is not None:
+            q['_source'] = {'includes': sorted(fields_filter | {'permalink', 'subreddit_id'})}
+
+        body = orjson.dumps(q, option=orjson.OPT_SORT_KEYS)
+        cache_key = response_cache.make_key(f"{self.es_index}:ids", body)
+        content = response_cache.get(cache_key)
+        if content is None:
+            try:
+                response = hedged_post(
+                    f"{ES_PRIMARY}{self.es_index}",
+                    f"{ES_FALLBACK}{self.es_index}",
+                    body
+                )
+            except requests.RequestException as e:
+                logger.error("Failed to fetch submissions: %s", e)
+                content = response_cache.get_stale(cache_key)
+                if content is None:
+                    raise ElasticsearchError(f"Failed to retrieve submissions: {e}")
+            else:
+                content = response.content
+                response_cache.set(cache_key, content, 'search')
         
-        s = json.loads(response.text)
+        s = orjson.loads(content)
         results = []
-        
+        encoded_ids = {}
+        b36 = base36encode
+
         for hit in s.get("hits", {}).get("hits", []):
             source = hit["_source"]
-            source["id"] = base36encode(int(hit["_id"]))
-            
+            source["id"] = b36(int(hit["_id"]))
+
             if 'subreddit_id' in source:
-                source['subreddit_id'] = "t5_" + base36encode(source['subreddit_id'])
-            
+                subreddit_id = source['subreddit_id']
+                formatted = encoded_ids.get(subreddit_id)
+                if formatted is None:
+                    formatted = encoded_ids[subreddit_id] = f"t5_{b36(subreddit_id)}"
+                source['subreddit_id'] = formatted
+
             source["full_link"] = f"https://www.reddit.com{source['permalink']}"
-            
-            # Apply field filtering
-            self._apply_field_filter(source)
-            
+
+            # Apply field filtering if requested
+            if fields_filter is not None:
+                for key in [k for k in source if k.lower() not in fields_filter]:
+                    del source[key]
+
             results.append(source)
         
         return {"data": results, "metadata": {}}
@@ -375,22 +502,37 @@ class CommentIDsGetter:
             submission_id = submission_id[3:]
         
         submission_id = base36decode(submission_id)
-        
-        try:
-            rows = DBFunctions.pgdb.execute(
-                "SELECT (json->>'id')::bigint comment_id FROM comment WHERE (json->>'link_id')::int = %s ORDER BY comment_id ASC LIMIT 50000",
-                submission_id
-            )
-        except Exception as e:
-            logger.error(f"Failed to get comment IDs: {e}")
-            raise APIError(f"Failed to retrieve comment IDs: {e}")
-        
-        results = []
-        if rows:
-            for row in rows:
-                comment_id = row[0]
-                results.append(base36encode(comment_id))
-        
-        data = {"data": results}
+
+        # Comment ID sets for a thread only grow, so they cache well; a hit
+        # skips both the Postgres scan and the per-ID encoding
+        cache_key = response_cache.make_key('comment_ids', str(submission_id).encode())
+        content = response_cache.get(cache_key)
+
+        if content is None:
+            try:
+                # Aggregate server-side: one array row instead of materializing
+                # up to 50k single-column tuples across the driver boundary
+                rows = DBFunctions.pgdb.execute(
+                    "SELECT array_agg(comment_id ORDER BY comment_id) FROM ("
+                    "SELECT (json->>'id')::bigint comment_id FROM comment "
+                    "WHERE (json->>'link_id')::int = %s "
+                    "ORDER BY comment_id ASC LIMIT 50000) ids",
+                    (submission_id,)
+                )
+            except Exception as e:
+                logger.error("Failed to get comment IDs: %s", e)
+                content = response_cache.get_stale(cache_key)
+                if content is None:
+                    raise APIError(f"Failed to retrieve comment IDs: {e}")
+            else:
+                comment_ids = rows[0][0] if rows and rows[0][0] is not None else []
+                b36 = base36encode
+                content = fast_json.dumps({"data": [b36(cid) for cid in comment_ids]})
+                response_cache.set(cache_key, content, 'comment_ids')
+
         resp.cache_control = ["public", "max-age=5", "s-maxage=5"]
-        resp.body = json.dumps(data, sort_keys=True, indent=4, separators=(',', ': '))
\ No newline at end of file
+        resp.content_type = falcon.MEDIA_JSON
+        if req.params.get('pretty') in ('1', 'true'):
+            resp.data = fast_json.dumps(orjson.loads(content), pretty=True)
+        else:
+            resp.data = content
\ No newline at end of file
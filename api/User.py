@@ -1,13 +1,16 @@
 """User analysis handler for Reddit API."""
 import time
-import json
+import orjson
 import requests
-from collections import defaultdict
+import falcon
 from typing import Dict, Any, Optional
 import logging
 
+import fast_json
 from Helpers import base36encode
-from config import config
+from cache import response_cache
+from config import ES_PRIMARY, ES_FALLBACK
+from http_client import hedged_post
 from logger_config import default_logger
 
 logger = default_logger
@@ -18,7 +21,6 @@ class UserAnalyzer:
     
     def __init__(self):
         """Initialize the user analyzer."""
-        self.es_primary, self.es_fallback = config.get_elasticsearch_urls()
         self.es_index = "/rc/comments/_search"
     
     def on_get(self, req, resp, author: str):
@@ -33,81 +35,74 @@ class UserAnalyzer:
         start_time = time.time()
         params = req.params
         
-        search_url = f"{self.es_primary}{self.es_index}"
-        
-        nested_dict = lambda: defaultdict(nested_dict)
-        q = nested_dict()
+        search_url = f"{ES_PRIMARY}{self.es_index}"
         
         size = 2500
-        sort_direction = 'desc'
-        q['query']['bool']['filter'] = []
-        q['size'] = size
-        
+        q = {
+            'query': {'bool': {'filter': []}},
+            'size': size,
+            'sort': {'created_utc': 'desc'},
+            'aggs': {
+                'created_utc': {
+                    'date_histogram': {'field': 'created_utc', 'interval': "day", 'order': {'_key': 'asc'}}
+                },
+                'subreddit': {'terms': {'field': 'subreddit.keyword', 'size': size, 'order': {'_count': 'desc'}}},
+                'link_id': {'terms': {'field': 'link_id', 'size': 25, 'order': {'_count': 'desc'}}}
+            }
+        }
+
         # Filter by author
         if author is not None:
-            terms = nested_dict()
-            terms['terms']['author'] = [author.lower()]
-            q['query']['bool']['filter'].append(terms)
-        
-        q['size'] = size
-        q['sort']['created_utc'] = sort_direction
+            q['query']['bool']['filter'].append({'terms': {'author': [author.lower()]}})
         
-        # Add time aggregation
-        q['aggs']['created_utc']['date_histogram']['field'] = 'created_utc'
-        q['aggs']['created_utc']['date_histogram']['interval'] = "day"
-        q['aggs']['created_utc']['date_histogram']['order']['_key'] = 'asc'
-        
-        # Add subreddit aggregation
-        q['aggs']['subreddit']['terms']['field'] = 'subreddit.keyword'
-        q['aggs']['subreddit']['terms']['size'] = size
-        q['aggs']['subreddit']['terms']['order']['_count'] = 'desc'
-        
-        # Add link_id aggregation
-        q['aggs']['link_id']['terms']['field'] = 'link_id'
-        q['aggs']['link_id']['terms']['size'] = 25
-        q['aggs']['link_id']['terms']['order']['_count'] = 'desc'
-        
-        try:
-            response = requests.get(search_url, data=json.dumps(q), timeout=30)
-            response.raise_for_status()
-            
-            es_response = json.loads(response.text)
-            
+        # Sorted keys give a canonical body, so identical queries share a key
+        body = orjson.dumps(q, option=orjson.OPT_SORT_KEYS)
+        cache_key = response_cache.make_key(self.es_index, body)
+
+        # The cache holds the post-processed ES body (link_id buckets already
+        # rewritten), so a hit is served without parsing or re-encoding it
+        content = response_cache.get(cache_key)
+
+        if content is None:
+            try:
+                response = hedged_post(search_url, f"{ES_FALLBACK}{self.es_index}", body)
+                raw = response.content
+            except requests.RequestException as e:
+                logger.error("Failed to analyze user %s: %s", author, e)
+                content = response_cache.get_stale(cache_key)
+                if content is None:
+                    resp.status = 500
+                    resp.content_type = falcon.MEDIA_JSON
+                    resp.data = fast_json.dumps({
+                        "error": "Failed to analyze user",
+                        "message": str(e)
+                    })
+                    return
+
+        if content is None:
+            es_response = orjson.loads(raw)
+
             # Process link IDs (convert to base36)
             if es_response.get('aggregations', {}).get('link_id', {}).get('buckets'):
+                b36 = base36encode
                 for bucket in es_response['aggregations']['link_id']['buckets']:
-                    bucket['key'] = 't3_' + base36encode(bucket['key'])
-            
-        except requests.RequestException as e:
-            logger.error(f"Failed to analyze user {author}: {e}")
-            # Try fallback
-            try:
-                search_url = f"{self.es_fallback}{self.es_index}"
-                response = requests.get(search_url, data=json.dumps(q), timeout=30)
-                response.raise_for_status()
-                es_response = json.loads(response.text)
-                
-                if es_response.get('aggregations', {}).get('link_id', {}).get('buckets'):
-                    for bucket in es_response['aggregations']['link_id']['buckets']:
-                        bucket['key'] = 't3_' + base36encode(bucket['key'])
-            except requests.RequestException as e2:
-                logger.error(f"Both Elasticsearch nodes failed: {e2}")
-                resp.status = 500
-                resp.body = json.dumps({
-                    "error": "Failed to analyze user",
-                    "message": str(e2)
-                })
-                return
-        
+                    bucket['key'] = f"t3_{b36(bucket['key'])}"
+
+            content = orjson.dumps(es_response)
+            response_cache.set(cache_key, content, 'analyze')
+
         end_time = time.time()
-        
-        data = {
-            "data": es_response,
-            "metadata": {
-                "execution_time_milliseconds": round((end_time - start_time) * 1000, 2),
-                "version": "v3.0"
-            }
+
+        metadata = {
+            "execution_time_milliseconds": round((end_time - start_time) * 1000, 2),
+            "version": "v3.0"
         }
-        
+
         resp.cache_control = ['public', 'max-age=2', 's-maxage=2']
-        resp.body = json.dumps(data, sort_keys=True, indent=4, separators=(',', ': '))
\ No newline at end of file
+        resp.content_type = falcon.MEDIA_JSON
+        if params.get('pretty') in ('1', 'true'):
+            resp.data = fast_json.dumps({"data": orjson.loads(content), "metadata": metadata}, pretty=True)
+        else:
+            # Splice the already-encoded ES bytes into the envelope instead of
+            # parsing and re-dumping the whole tree just to attach metadata
+            resp.data = b'{"data":' + content + b',"metadata":' + orjson.dumps(metadata) + b'}'
\ No newline at end of file
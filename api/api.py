@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
 """Main API entry point for Pushshift Reddit API."""
 import falcon
+import orjson
+from falcon import media
 from Comment import CommentSearch
 from Submission import SubmissionSearch, CommentIDsGetter
 from User import UserAnalyzer
 from logger_config import default_logger
 
 logger = default_logger
+
+
+# Compact orjson output by default; handlers honor ?pretty=1 for the old
+# sorted, indented layout
+json_handler = media.JSONHandler(dumps=orjson.dumps, loads=orjson.loads)
+
 api = falcon.API()
+api.req_options.media_handlers['application/json'] = json_handler
+api.resp_options.media_handlers['application/json'] = json_handler
 
 api.add_route('/reddit/search', CommentSearch())
 api.add_route('/reddit/comment/search', CommentSearch())
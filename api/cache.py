@@ -0,0 +1,94 @@
+"""Redis-backed cache for raw Elasticsearch responses."""
+import logging
+from hashlib import blake2b
+from typing import Optional
+
+import orjson
+import redis
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# TTL policies in seconds as (fresh, stale). A response is served directly
+# while fresh; after that it stays retrievable for the stale window so a dead
+# ES cluster degrades to slightly old data instead of an HTTP 500
+POLICIES = {
+    'search': (2, 300),
+    'analyze': (10, 600),
+    'comment_ids': (60, 3600),
+}
+
+
+class ResponseCache:
+    """Caches raw ES response bytes in Redis with stale-on-error fallback."""
+
+    def __init__(self):
+        """Connect to Redis; caching degrades to a no-op when unavailable."""
+        self._redis = None
+        try:
+            host, port = config.get_redis_address()
+            self._redis = redis.Redis(
+                host=host,
+                port=port,
+                socket_connect_timeout=0.25,
+                socket_timeout=0.25
+            )
+            self._redis.ping()
+            logger.info("Response cache connected to Redis on %s:%s", host, port)
+        except Exception as e:
+            logger.warning("Redis unavailable, response caching disabled: %s", e)
+            self._redis = None
+
+    @staticmethod
+    def make_key(scope: str, body: bytes) -> str:
+        """
+        Build a cache key from an endpoint scope and a canonical query body.
+
+        Args:
+            scope: Namespace for the key, typically the ES index path
+            body: Serialized query (callers sort keys for a canonical form)
+
+        Returns:
+            Cache key string
+        """
+        digest = blake2b(scope.encode() + b'\0' + body, digest_size=16).hexdigest()
+        return f"es:{digest}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached bytes for key if still fresh, else None."""
+        if self._redis is None:
+            return None
+        try:
+            if self._redis.exists(f"{key}:fresh"):
+                return self._redis.get(key)
+        except redis.RedisError as e:
+            logger.warning("Redis get failed: %s", e)
+        return None
+
+    def get_stale(self, key: str) -> Optional[bytes]:
+        """Return the cached bytes for key even when no longer fresh."""
+        if self._redis is None:
+            return None
+        try:
+            return self._redis.get(key)
+        except redis.RedisError as e:
+            logger.warning("Redis get failed: %s", e)
+            return None
+
+    def set(self, key: str, value: bytes, policy: str):
+        """Store value under key using the TTLs of the named policy."""
+        if self._redis is None:
+            return
+        fresh_ttl, stale_ttl = POLICIES[policy]
+        try:
+            pipe = self._redis.pipeline()
+            pipe.set(key, value, ex=stale_ttl)
+            pipe.set(f"{key}:fresh", 1, ex=fresh_ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Redis set failed: %s", e)
+
+
+# Global cache instance
+response_cache = ResponseCache()
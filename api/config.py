@@ -1,6 +1,6 @@
 """Configuration management for the API."""
 import os
-from configparser import ConfigParser
+from configparser import ConfigParser, Error as ConfigParserError
 from typing import Dict, Any
 
 
@@ -31,12 +31,17 @@ class Config:
             'primary': os.getenv('ES_PRIMARY', self._get_config('elasticsearch', 'primary', 'http://mars:9200')),
             'fallback': os.getenv('ES_FALLBACK', self._get_config('elasticsearch', 'fallback', 'http://jupiter:9200')),
         }
+
+        self.redis_config = {
+            'host': os.getenv('REDIS_HOST', self._get_config('redis', 'host', 'localhost')),
+            'port': os.getenv('REDIS_PORT', self._get_config('redis', 'port', '6379')),
+        }
     
     def _get_config(self, section: str, key: str, default: Any = None) -> Any:
         """Get configuration value with optional default."""
         try:
             return self._config.get(section, key)
-        except (KeyError, AttributeError):
+        except (ConfigParserError, KeyError, AttributeError):
             return default
     
     def get_db_connection_string(self) -> str:
@@ -56,6 +61,17 @@ class Config:
             self.elasticsearch_config['fallback']
         )
 
+    def get_redis_address(self) -> tuple:
+        """Get Redis host and port."""
+        return (
+            self.redis_config['host'],
+            int(self.redis_config['port'])
+        )
+
 
 # Global config instance
 config = Config()
+
+# Frozen at import: the node addresses never change over a process lifetime,
+# so handlers import these instead of re-reading the config per instance
+ES_PRIMARY, ES_FALLBACK = config.get_elasticsearch_urls()
@@ -0,0 +1,22 @@
+"""Thin orjson wrapper shared by the response handlers."""
+import orjson
+
+# Sorted keys and two-space indent for human consumption; opt-in via ?pretty=1
+PRETTY = orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2
+
+
+def dumps(obj, pretty: bool = False) -> bytes:
+    """
+    Serialize an object to JSON bytes, compact by default.
+
+    Args:
+        obj: Object to serialize
+        pretty: Emit indented, key-sorted output for human readers
+
+    Returns:
+        UTF-8 encoded JSON bytes
+    """
+    return orjson.dumps(obj, option=PRETTY if pretty else 0)
+
+
+loads = orjson.loads
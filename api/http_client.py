@@ -0,0 +1,96 @@
+"""Shared HTTP session for Elasticsearch requests."""
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+def _build_session() -> requests.Session:
+    """
+    Build a requests session with a persistent connection pool.
+
+    Reusing keep-alive connections avoids a TCP (and TLS) handshake per
+    Elasticsearch query, which otherwise adds a full round-trip to every
+    request under load.
+
+    Returns:
+        Configured requests.Session instance
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(total=2, backoff_factor=0.1)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Global session shared by all handlers
+es_session = _build_session()
+
+# Elasticsearch accepts request bodies on POST; requests with a body
+# should not go out as GET.
+ES_HEADERS = {'Content-Type': 'application/json'}
+
+# How long to give the primary node before racing the fallback, in seconds.
+# Normal queries answer well inside this, so the fallback only fires when the
+# primary is slow or down
+HEDGE_DELAY = 0.2
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16)
+
+
+def hedged_post(primary_uri: str, fallback_uri: str, data: bytes, timeout: int = 30) -> requests.Response:
+    """
+    POST to the primary node, hedging with the fallback on a slow reply.
+
+    Fires the request at the primary; if it has not answered within
+    HEDGE_DELAY the same body is sent to the fallback and whichever node
+    responds first wins. A node that fails outright is covered by the other,
+    so tail latency no longer serializes two full timeouts.
+
+    Args:
+        primary_uri: Primary Elasticsearch endpoint URL
+        fallback_uri: Fallback Elasticsearch endpoint URL
+        data: Serialized request body
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        The first successful requests.Response
+
+    Raises:
+        requests.RequestException: If both nodes fail
+    """
+    def post(uri):
+        response = es_session.post(uri, data=data, headers=ES_HEADERS, timeout=timeout)
+        response.raise_for_status()
+        return response
+
+    primary = _hedge_executor.submit(post, primary_uri)
+    done, _ = wait([primary], timeout=HEDGE_DELAY)
+    if done:
+        try:
+            return primary.result()
+        except requests.RequestException as e:
+            # Primary failed fast; no point racing, just ask the fallback
+            logger.warning("Elasticsearch primary failed: %s, trying fallback...", e)
+            return post(fallback_uri)
+
+    # Primary is slow: race the fallback against it and take the first winner
+    pending = {primary, _hedge_executor.submit(post, fallback_uri)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except requests.RequestException as e:
+                error = e
+    logger.error("Both Elasticsearch nodes failed: %s", error)
+    raise error
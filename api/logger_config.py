@@ -1,50 +1,61 @@
 """Logging configuration for the API."""
+import atexit
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
 def setup_logger(name: str, log_file: str = 'api.log', level: int = logging.INFO) -> logging.Logger:
     """
-    Set up a logger with both file and console handlers.
-    
+    Set up a logger whose handlers run on a background thread.
+
+    Handlers attach to a QueueListener, so file and console I/O never block
+    the request thread that emits a record; the handler only enqueues.
+
     Args:
         name: Logger name
         log_file: Path to log file
         level: Logging level
-        
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Avoid duplicate handlers
     if logger.handlers:
         return logger
-    
+
     # File handler with rotation
     file_handler = RotatingFileHandler(
-        log_file, 
+        log_file,
         maxBytes=10*1024*1024,  # 10MB
         backupCount=5
     )
     file_handler.setLevel(level)
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.WARNING)  # Only show warnings/errors on console
-    
+
     # Formatter
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+
+    # The request thread only enqueues; the listener thread does the I/O.
+    # respect_handler_level keeps the console filtered to warnings
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(QueueHandler(log_queue))
+
     return logger
 
 